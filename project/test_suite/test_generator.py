@@ -8,11 +8,46 @@ corresponding JSON outputs, supporting multiple test configurations per file.
 
 import os
 import sys
-import json
+import mmap
+import hashlib
 import argparse
-import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Dict, Optional, List, Tuple
 
+# Use orjson's C-accelerated parser/serializer when available; its default
+# output is already compact, so no separators are needed. The stdlib
+# fallback imports json lazily so error-only runs never pay for it.
+try:
+    import orjson
+
+    def _loads(text):
+        return orjson.loads(text)
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _loads(text):
+        import json
+        return json.loads(text)
+
+    def _dumps(obj):
+        import json
+        return json.dumps(obj, separators=(',', ':'))
+
+# ijson allows re-emitting large JSON files in compact form without ever
+# materializing the full object tree
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Streaming only pays off on large files; small ones stay on the direct path
+STREAM_THRESHOLD = 256 * 1024
+
+# Above this size the already-compact probe runs over a memory mapping so the
+# file is not copied into the Python heap unless a re-encode is needed
+MMAP_THRESHOLD = 64 * 1024
+
 
 # Descriptions for the test files
 TEST_DESCRIPTIONS = {
@@ -61,17 +96,151 @@ TEST_CONFIGS = {
 }
 
 
-def read_file(file_path: str) -> Optional[str]:
-    """Read the contents of a file"""
+# Intern the static table keys so the per-file names interned below share
+# one cached hash across every lookup
+TEST_DESCRIPTIONS = {sys.intern(key): value for key, value in TEST_DESCRIPTIONS.items()}
+ERROR_FILES = {sys.intern(key): value for key, value in ERROR_FILES.items()}
+TEST_CONFIGS = {sys.intern(key): value for key, value in TEST_CONFIGS.items()}
+
+
+def _needs_json(name: str) -> bool:
+    """Decide from the static tables whether a test needs its JSON output"""
+    configs = TEST_CONFIGS.get(name)
+    if configs:
+        return any(cfg[0] == "parser" and cfg[1] == "SUCCESS" for cfg in configs)
+    return name not in ERROR_FILES
+
+
+def _resolve(name: str) -> Tuple[bytes, List[tuple], bool]:
+    """
+    Resolve description, configurations, and JSON need for a known test.
+    The description is pre-encoded for the binary write path.
+    """
+    description = TEST_DESCRIPTIONS.get(name, f"Test for {name}").encode()
+    configs = TEST_CONFIGS.get(name)
+    if not configs:
+        if name in ERROR_FILES:
+            # Default error test
+            configs = [("parser", "ERROR", ERROR_FILES[name])]
+        else:
+            # Default success test
+            configs = [("parser", "SUCCESS", None)]
+    return description, configs, _needs_json(name)
+
+
+# Everything create_test_file needs per test name, resolved once at import
+# time so the per-file work is a single dict lookup
+KNOWN_FILES = set(TEST_DESCRIPTIONS) | set(ERROR_FILES) | set(TEST_CONFIGS)
+RESOLVED_TESTS = {name: _resolve(name) for name in KNOWN_FILES}
+
+
+def _config_header(run_type: str, expect: str, error_type: Optional[str]) -> bytes:
+    """Render the constant directive lines for one configuration"""
+    lines = f"// RUN: {run_type}\n// EXPECT: {expect}\n"
+    if expect == "ERROR" and error_type:
+        lines += f"// ERROR_TYPE: {error_type}\n"
+    return lines.encode()
+
+
+# Directive lines per configuration tuple, rendered once at import time; only
+# the RESULT line still has to be assembled at runtime
+CONFIG_LINES = {config: _config_header(*config)
+                for _, configs, _needs in RESOLVED_TESTS.values()
+                for config in configs}
+
+
+def read_file(file_path: str, messages: Optional[List[str]] = None) -> Optional[bytes]:
+    """Read the contents of a file as bytes, skipping the text decoder"""
     try:
-        with open(file_path, 'r') as f:
+        with open(file_path, 'rb') as f:
             return f.read()
     except Exception as e:
-        print(f"Error reading file {file_path}: {e}")
+        message = f"Error reading file {file_path}: {e}"
+        if messages is not None:
+            messages.append(message)
+        else:
+            print(message)
         return None
 
 
-def create_test_file(tc_file: str, json_file: str, output_file: str, use_prefix: bool = False) -> bool:
+def compact_stream(file_path: str) -> str:
+    """Re-emit a JSON file in compact form via ijson without building the object tree"""
+    import io
+    buf = io.StringIO()
+    write = buf.write
+    need_comma = False
+    with open(file_path, 'rb') as f:
+        for _, event, value in ijson.parse(f):
+            if event == 'start_map':
+                if need_comma:
+                    write(',')
+                write('{')
+                need_comma = False
+            elif event == 'map_key':
+                if need_comma:
+                    write(',')
+                write(_dumps(value))
+                write(':')
+                need_comma = False
+            elif event == 'end_map':
+                write('}')
+                need_comma = True
+            elif event == 'start_array':
+                if need_comma:
+                    write(',')
+                write('[')
+                need_comma = False
+            elif event == 'end_array':
+                write(']')
+                need_comma = True
+            else:
+                # Scalar value (string, number, boolean, or null)
+                if need_comma:
+                    write(',')
+                if value is True:
+                    write('true')
+                elif value is False:
+                    write('false')
+                elif value is None:
+                    write('null')
+                elif isinstance(value, str):
+                    write(_dumps(value))
+                else:
+                    write(str(value))
+                need_comma = True
+    return buf.getvalue()
+
+
+def fingerprint_inputs(tc_bytes: bytes, json_bytes: Optional[bytes]) -> str:
+    """Fingerprint a (tc, json) input pair with a fast keyed-size blake2b hash"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(tc_bytes)
+    h.update(b'\0')
+    if json_bytes is not None:
+        h.update(json_bytes)
+    return h.hexdigest()
+
+
+def load_json_cache(cache_path: str) -> Dict[str, list]:
+    """Load a persistent JSON sidecar cache, if present"""
+    try:
+        with open(cache_path, 'rb') as f:
+            return _loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json_cache(cache_path: str, cache: Dict[str, list]) -> None:
+    """Write a JSON sidecar cache back to disk"""
+    try:
+        with open(cache_path, 'w') as f:
+            f.write(_dumps(cache))
+    except OSError as e:
+        print(f"Warning: Could not write JSON cache {cache_path}: {e}")
+
+
+def create_test_file(tc_file: str, json_file: str, output_file: str, use_prefix: bool = False,
+                     cache: Optional[Dict[str, list]] = None) -> Tuple[bool, List[str]]:
     """
     Create a test file from TinyC code and expected JSON output.
 
@@ -80,65 +249,123 @@ def create_test_file(tc_file: str, json_file: str, output_file: str, use_prefix:
         json_file: Path to the expected JSON output file
         output_file: Path to write the test file
         use_prefix: Whether to add 'test_' prefix to the output filename
+        cache: Optional cross-run cache mapping JSON paths to their compact form
 
     Returns:
-        True if successful, False otherwise
+        Tuple of (success, status messages); messages are collected rather
+        than printed so the caller can emit them in one batch
     """
+    messages = []
+
     # Read input files
-    tc_code = read_file(tc_file)
+    tc_code = read_file(tc_file, messages)
     if tc_code is None:
-        return False
-
-    # Extract base name for description lookup
-    base_name = os.path.basename(tc_file)
-    name_without_ext = os.path.splitext(base_name)[0]
-
-    # Get description for this test
-    description = TEST_DESCRIPTIONS.get(name_without_ext, f"Test for {name_without_ext}")
-
-    # Get test configurations
-    configs = TEST_CONFIGS.get(name_without_ext, [])
-
-    # If no specific configs defined, create default parser test
-    if not configs:
-        if name_without_ext in ERROR_FILES:
-            # Default error test
-            error_type = ERROR_FILES[name_without_ext]
-            configs = [("parser", "ERROR", error_type)]
-        else:
-            # Default success test
-            configs = [("parser", "SUCCESS", None)]
+        return False, messages
+
+    # Extract base name for description lookup; paths here are built with
+    # os.path.join against known roots and always carry the .tc suffix, so a
+    # single rpartition plus a fixed-length slice replaces the os.path chain
+    base_name = tc_file.rpartition(os.sep)[2]
+    name_without_ext = sys.intern(base_name[:-3])
+
+    # Resolve description, configurations, and JSON need in one lookup;
+    # unknown files default to a parser SUCCESS configuration
+    entry = RESOLVED_TESTS.get(name_without_ext)
+    if entry:
+        description, configs, needs_json = entry
+    else:
+        description = f"Test for {name_without_ext}".encode()
+        configs = [("parser", "SUCCESS", None)]
+        needs_json = True
 
     # Load JSON output for parser success tests
     json_output = None
-    if any(cfg[0] == "parser" and cfg[1] == "SUCCESS" for cfg in configs):
-        json_output = read_file(json_file)
-        if json_output is None and not name_without_ext in ERROR_FILES:
-            print(f"Warning: No JSON file found for {tc_file}")
-            return False
-
-        # Try to compact the JSON for better readability
-        try:
-            json_obj = json.loads(json_output)
-            json_output = json.dumps(json_obj, separators=(',', ':'))
-        except json.JSONDecodeError:
-            print(f"Warning: Could not parse JSON from {json_file}, using as-is")
-            json_output = json_output.strip() if json_output else None
-
-    # Create test file content
-    test_content = f"// TINYC TEST\n// INFO: {description}\n"
-
-    # Add test configurations
-    for run_type, expect, error_type in configs:
-        test_content += f"// RUN: {run_type}\n"
-        test_content += f"// EXPECT: {expect}\n"
-
-        if expect == "ERROR" and error_type:
-            test_content += f"// ERROR_TYPE: {error_type}\n"
-        elif expect == "SUCCESS" and run_type == "parser" and json_output:
-            test_content += f"// RESULT: {json_output}\n"
-
-    test_content += f"\n{tc_code}"
+    if needs_json:
+        # Reuse the cached compact form when the JSON file is unchanged
+        st = None
+        if json_file:
+            try:
+                st = os.stat(json_file)
+            except OSError:
+                st = None
+        if cache is not None and st is not None:
+            entry = cache.get(json_file)
+            if entry and entry[0] == st.st_mtime and entry[1] == st.st_size:
+                json_output = entry[2].encode()
+
+        # Stream large files through ijson so the full object tree is never
+        # materialized in memory
+        if json_output is None and ijson is not None and st is not None \
+                and st.st_size > STREAM_THRESHOLD:
+            try:
+                compact = compact_stream(json_file)
+                json_output = compact.encode()
+                if cache is not None:
+                    cache[json_file] = [st.st_mtime, st.st_size, compact]
+            except Exception as e:
+                messages.append(f"Warning: Could not stream JSON from {json_file}: {e}")
+                json_output = None
+
+        # Memory-map mid-sized files: the compact probe then scans the page
+        # cache directly and only materializes a copy when re-encoding
+        if json_output is None and st is not None and st.st_size > MMAP_THRESHOLD:
+            try:
+                with open(json_file, 'rb') as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except OSError as e:
+                messages.append(f"Warning: Could not mmap {json_file}: {e}")
+            else:
+                with mm:
+                    if mm.find(b'\n') < 0 and mm.find(b'\t') < 0 \
+                            and mm.find(b', ') < 0 and mm.find(b': ') < 0:
+                        json_output = bytes(mm).strip()
+                        compact = json_output.decode()
+                    else:
+                        compact = _dumps(_loads(bytes(mm)))
+                        json_output = compact.encode()
+                if cache is not None:
+                    cache[json_file] = [st.st_mtime, st.st_size, compact]
+
+        if json_output is None:
+            json_output = read_file(json_file, messages)
+            if json_output is None and not name_without_ext in ERROR_FILES:
+                messages.append(f"Warning: No JSON file found for {tc_file}")
+                return False, messages
+
+            # Machine-generated JSON that is already compact (single line, no
+            # spaces after separators) can be used as-is without a decode
+            raw = json_output.strip()
+            if b'\n' not in raw and b'\t' not in raw and b', ' not in raw and b': ' not in raw:
+                json_output = raw
+                if cache is not None and st is not None:
+                    cache[json_file] = [st.st_mtime, st.st_size, raw.decode()]
+            else:
+                # Compact the JSON for better readability. The inputs are
+                # machine-generated AST dumps, so malformed JSON means the
+                # fixture is broken and should fail loud rather than be
+                # passed through as-is.
+                compact = _dumps(_loads(json_output))
+                json_output = compact.encode()
+                if cache is not None and st is not None:
+                    cache[json_file] = [st.st_mtime, st.st_size, compact]
+
+    # Create test file content as a list of byte parts written in one go;
+    # staying in bytes end to end skips the codec layer on both sides
+    parts = [b"// TINYC TEST\n// INFO: " + description + b"\n"]
+
+    # Add test configurations via the precomputed directive lines
+    for config in configs:
+        header = CONFIG_LINES.get(config)
+        if header is None:
+            header = _config_header(*config)
+        parts.append(header)
+
+        run_type, expect, _ = config
+        if expect == "SUCCESS" and run_type == "parser" and json_output:
+            parts.append(b"// RESULT: " + json_output + b"\n")
+
+    parts.append(b'\n')
+    parts.append(tc_code)
 
     # Apply prefix to filename if requested
     if use_prefix and not os.path.basename(output_file).startswith('test_'):
@@ -146,16 +373,68 @@ def create_test_file(tc_file: str, json_file: str, output_file: str, use_prefix:
         output_base = os.path.basename(output_file)
         output_file = os.path.join(output_dir, f"test_{output_base}")
 
-    # Write test file
+    # Skip the write when the file is already up to date; this keeps mtimes
+    # stable so downstream tooling does not see every test file as dirty
+    test_content = b''.join(parts)
     try:
-        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
-        with open(output_file, 'w') as f:
+        with open(output_file, 'rb') as f:
+            existing = f.read()
+    except OSError:
+        existing = None
+    if existing == test_content:
+        messages.append(f"Unchanged test file: {output_file}")
+        return True, messages
+
+    # Write test file; the output directory was already created by main()
+    try:
+        with open(output_file, 'wb') as f:
             f.write(test_content)
-        print(f"Created test file: {output_file}")
-        return True
+        messages.append(f"Created test file: {output_file}")
+        return True, messages
     except Exception as e:
-        print(f"Error creating test file {output_file}: {e}")
-        return False
+        messages.append(f"Error creating test file {output_file}: {e}")
+        return False, messages
+
+
+def generate_one(tc_file: str, json_file: Optional[str], output_file: str, use_prefix: bool,
+                 cache: Optional[Dict[str, list]],
+                 input_hashes: Optional[Dict[str, str]] = None):
+    """
+    Generate a single test file in a worker process.
+
+    Returns:
+        Tuple of (success, cache_updates, messages, hash_update) where
+        cache_updates holds entries added or refreshed by this task and
+        hash_update is the (basename, digest) pair to record, if any
+    """
+    # Short-circuit when the input pair is byte-identical to the last run and
+    # the output already exists; hashing is far cheaper than re-compaction
+    basename = output_file.rpartition(os.sep)[2]
+    digest = None
+    if input_hashes is not None:
+        tc_bytes = read_file(tc_file)
+        if tc_bytes is not None:
+            json_bytes = read_file(json_file) if json_file else None
+            digest = fingerprint_inputs(tc_bytes, json_bytes)
+            if use_prefix and not basename.startswith('test_'):
+                check_path = os.path.join(os.path.dirname(output_file), f"test_{basename}")
+            else:
+                check_path = output_file
+            if input_hashes.get(basename) == digest and os.path.exists(check_path):
+                return True, {}, [f"Unchanged test file: {check_path}"], None
+
+    local_cache = dict(cache) if cache is not None else None
+    success, messages = create_test_file(tc_file, json_file, output_file, use_prefix,
+                                         cache=local_cache)
+
+    updates = {}
+    if local_cache is not None:
+        for key, value in local_cache.items():
+            if cache.get(key) != value:
+                updates[key] = value
+
+    hash_update = (basename, digest) if success and digest else None
+    return success, updates, messages, hash_update
 
 
 def main():
@@ -174,42 +453,90 @@ def main():
     # Create output directory if it doesn't exist
     os.makedirs(args.output_dir, exist_ok=True)
 
-    # Find all .tc files
-    tc_files = glob.glob(os.path.join(args.tc_dir, "*.tc"))
-    tc_files.sort()  # Process in sorted order
+    # Load the cross-run JSON compaction cache so unchanged files skip re-parsing
+    cache_path = os.path.join(args.output_dir, '.jsoncache')
+    json_cache = load_json_cache(cache_path)
+    loaded_cache = {key: list(value) for key, value in json_cache.items()}
+
+    # Load the input fingerprints so fully unchanged (tc, json) pairs are
+    # skipped without any compaction work
+    hashes_path = os.path.join(args.output_dir, '.inputhashes')
+    input_hashes = load_json_cache(hashes_path)
+    loaded_hashes = dict(input_hashes)
+
+    # Scan both directories once: the available JSON outputs become a set of
+    # basenames, replacing a stat call per .tc file
+    try:
+        json_names = {entry.name[:-5] for entry in os.scandir(args.json_dir)
+                      if entry.name.endswith('.json')}
+    except OSError:
+        json_names = set()
+
+    # Find all .tc files, processed in sorted order
+    try:
+        tc_files = sorted(entry.path for entry in os.scandir(args.tc_dir)
+                          if entry.name.endswith('.tc'))
+    except OSError:
+        tc_files = []
 
     if not tc_files:
         print(f"No .tc files found in {args.tc_dir}")
         return 1
 
-    success_count = 0
+    # Status output is batched and written once at the end instead of being
+    # printed line by line
+    status_lines = []
+
+    # Build the task list up front; each task is independent of the others
+    tasks = []
     for tc_file in tc_files:
-        # Determine corresponding JSON file
-        basename = os.path.basename(tc_file)
-        name_without_ext = os.path.splitext(basename)[0]
-        json_file = os.path.join(args.json_dir, f"{name_without_ext}.json")
+        # Determine corresponding JSON file; the .tc suffix is a known
+        # constant, so the extension is dropped with a fixed-length slice
+        basename = tc_file.rpartition(os.sep)[2]
+        name_without_ext = sys.intern(basename[:-3])
+        output_file = os.path.join(args.output_dir, basename)
 
         # For error cases, we don't need the JSON file
         if name_without_ext in ERROR_FILES:
-            # Create output path
-            output_file = os.path.join(args.output_dir, basename)
-
-            # Create the test file
-            if create_test_file(tc_file, None, output_file, args.prefix):
-                success_count += 1
+            tasks.append((tc_file, None, output_file))
             continue
 
         # For regular files, check if JSON exists
-        if not os.path.exists(json_file):
-            print(f"Warning: No JSON file found for {tc_file}")
+        if name_without_ext not in json_names:
+            status_lines.append(f"Warning: No JSON file found for {tc_file}")
             continue
+        json_file = os.path.join(args.json_dir, f"{name_without_ext}.json")
 
-        # Create output path
-        output_file = os.path.join(args.output_dir, basename)
+        tasks.append((tc_file, json_file, output_file))
 
-        # Create the test file
-        if create_test_file(tc_file, json_file, output_file, args.prefix):
-            success_count += 1
+    # Generate test files in parallel; the JSON parse work dominates and has
+    # no shared mutable state, so this scales with the number of cores
+    success_count = 0
+    with ProcessPoolExecutor() as executor:
+        futures = {executor.submit(generate_one, tc_file, json_file, output_file,
+                                   args.prefix, json_cache, input_hashes): tc_file
+                   for tc_file, json_file, output_file in tasks}
+        for future in as_completed(futures):
+            try:
+                success, updates, messages, hash_update = future.result()
+            except Exception:
+                print(f"Error while generating test for {futures[future]}")
+                raise
+            if success:
+                success_count += 1
+            json_cache.update(updates)
+            if hash_update:
+                input_hashes[hash_update[0]] = hash_update[1]
+            status_lines.extend(messages)
+
+    # Persist the caches for the next run if anything changed
+    if json_cache != loaded_cache:
+        save_json_cache(cache_path, json_cache)
+    if input_hashes != loaded_hashes:
+        save_json_cache(hashes_path, input_hashes)
+
+    if status_lines:
+        sys.stdout.write('\n'.join(status_lines) + '\n')
 
     print(f"\nSummary: Created {success_count} test files out of {len(tc_files)} TinyC files")
     return 0